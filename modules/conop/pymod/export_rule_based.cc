@@ -23,6 +23,21 @@ using namespace boost::python;
 
 using namespace ost::conop;
 
+namespace {
+
+DiagnosticsPtr process_residues(const RuleBasedProcessor& p,
+                                const boost::python::object& residues,
+                                bool log_diags)
+{
+  ost::mol::ResidueHandleList res_list;
+  for (int i = 0; i < boost::python::len(residues); ++i) {
+    res_list.push_back(extract<ost::mol::ResidueHandle>(residues[i]));
+  }
+  return p.ProcessResidues(res_list, log_diags);
+}
+
+}
+
 void export_rule_based() {
   
   class_<RuleBasedProcessor, RuleBasedProcessorPtr, 
@@ -46,6 +61,8 @@ void export_rule_based() {
                  &RuleBasedProcessor::SetUnkAtomTreatment)
     .add_property("strict_hydrogens", &RuleBasedProcessor::GetStrictHydrogens,
                  &RuleBasedProcessor::SetStrictHydrogens)
+    .def("ProcessResidues", &process_residues,
+         (arg("residues"), arg("log_diags")=true))
   ;
 }
 
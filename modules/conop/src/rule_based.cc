@@ -17,6 +17,8 @@
 // 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 //------------------------------------------------------------------------------
 #include <limits>
+#include <set>
+#include <vector>
 #include <ost/log.hh>
 #include <ost/profile.hh>
 #include <ost/message.hh>
@@ -26,6 +28,7 @@
 #include <ost/mol/impl/residue_impl.hh>
 #include <ost/mol/impl/atom_impl.hh>
 #include <ost/mol/residue_handle.hh>
+#include <ost/mol/chain_handle.hh>
 #include "rule_based.hh"
 #include "conop.hh"
 
@@ -43,59 +46,148 @@ void RuleBasedProcessor::DoProcess(DiagnosticsPtr diags,
     mol::ResidueHandle prev;
     for (mol::ResidueHandleList::iterator 
          j = residues.begin(), e2 = residues.end(); j != e2; ++j) {
-      mol::ResidueHandle residue = *j;
-      mol::AtomHandleList atoms_to_connect;
-      CompoundPtr compound = lib_->FindCompound(residue.GetName(), Compound::PDB);
-      if (!compound && this->GetConnect()) {
-        // process unknown residue...
-        this->ProcessUnkResidue(diags, residue, atoms_to_connect);
-        for (mol::AtomHandleList::iterator k = atoms_to_connect.begin(),
-             e3=atoms_to_connect.end(); k!= e3; ++k) {
-          this->DistanceBasedConnect(*k);
-        }
+      if (this->ProcessResidue(diags, *j, prev)) {
+        prev = *j;
+      }
+    }
+    if (residues.empty() || !this->GetAssignTorsions()) {
+      continue;
+    }
+    AssignBackboneTorsions(residues);
+  }
+}
+
+DiagnosticsPtr RuleBasedProcessor::ProcessResidues(
+                                    const mol::ResidueHandleList& residues,
+                                    bool log_diags) const
+{
+  Profile prof("RuleBasedProcessor::ProcessResidues");
+  DiagnosticsPtr diags(new Diagnostics);
+  // group the residues by chain. Neighbours are taken from the residue list
+  // of each chain, GetPrev/GetNext are linear in the chain size when the
+  // chain is not in sequence.
+  std::set<unsigned long> to_process;
+  std::set<unsigned long> seen_chains;
+  mol::ChainHandleList chains;
+  for (mol::ResidueHandleList::const_iterator 
+       i = residues.begin(), e = residues.end(); i != e; ++i) {
+    if (!i->IsValid()) {
+      continue;
+    }
+    to_process.insert(i->GetHashCode());
+    mol::ChainHandle chain = i->GetChain();
+    if (seen_chains.insert(chain.GetHashCode()).second) {
+      chains.push_back(chain);
+    }
+  }
+  // process and connect all residues first. Torsions depend on chem classes
+  // and bonds of neighbouring residues, which might be in the list too.
+  std::vector<mol::ResidueHandleList> chain_residues(chains.size());
+  std::vector<std::vector<bool> > known(chains.size());
+  for (size_t c = 0; c < chains.size(); ++c) {
+    chain_residues[c] = chains[c].GetResidueList();
+    const mol::ResidueHandleList& res_list = chain_residues[c];
+    known[c].assign(res_list.size(), false);
+    for (size_t r = 0; r < res_list.size(); ++r) {
+      if (to_process.find(res_list[r].GetHashCode()) == to_process.end()) {
         continue;
       }
-      this->ReorderAtoms(residue, compound, this->GetFixElement());  
-      bool unks = this->HasUnknownAtoms(residue, compound, 
-                                        this->GetStrictHydrogens());
-      if (unks) {
-        mol::AtomHandleList unk_atoms;
-        unk_atoms = GetUnknownAtomsOfResidue(residue, compound, 
-                                             this->GetStrictHydrogens());
-        this->ProcessUnkAtoms(diags, residue, unk_atoms, atoms_to_connect);
-        residue.SetChemClass(mol::ChemClass(mol::ChemClass::UNKNOWN));
-        residue.SetChemType(mol::ChemType(mol::ChemType::UNKNOWN));
-        residue.SetOneLetterCode('?');
-      } else {
-        this->FillResidueProps(residue, compound);
+      mol::ResidueHandle residue = res_list[r];
+      mol::ResidueHandle prev = r > 0 ? res_list[r-1] : mol::ResidueHandle();
+      if (!this->ProcessResidue(diags, residue, prev)) {
+        // unknown residue, it might even be gone
+        continue;
       }
-      if (this->GetConnect()) {
-        this->ConnectAtomsOfResidue(residue, compound, 
-                                    this->GetStrictHydrogens());
-        if (this->GetConnectAminoAcids())
-          this->ConnectResidues(prev, residue);
-        for (mol::AtomHandleList::iterator k = atoms_to_connect.begin(),
-             e3=atoms_to_connect.end(); k!= e3; ++k) {
-          this->DistanceBasedConnect(*k);
+      // residue has been removed due to unknown atoms
+      if (residue.GetAtomCount() == 0) {
+        continue;
+      }
+      if (this->GetConnect() && this->GetConnectAminoAcids() &&
+          r+1 < res_list.size()) {
+        this->ConnectResidues(residue, res_list[r+1]);
+      }
+      known[c][r] = true;
+    }
+  }
+  if (this->GetAssignTorsions()) {
+    // a changed residue also affects PHI/OMEGA of the next residue
+    for (size_t c = 0; c < chains.size(); ++c) {
+      const mol::ResidueHandleList& res_list = chain_residues[c];
+      size_t n = res_list.size();
+      for (size_t r = 0; r < n; ++r) {
+        if (!known[c][r]) {
+          continue;
         }
-        if (!this->GetStrictHydrogens()) {
-          mol::AtomHandleList atoms = residue.GetAtomList();
-          for (mol::AtomHandleList::iterator k = atoms.begin(),
-               e3 = atoms.end(); k != e3; ++k) {
-            const String& ele = k->GetElement();
-            if ((ele == "D" || ele == "H") && k->GetBondCount() == 0) {
-              this->DistanceBasedConnect(*k);
-            }
-          }
+        mol::ResidueHandle none;
+        mol::ResidueHandle prev = r > 0 ? res_list[r-1] : none;
+        mol::ResidueHandle next = r+1 < n ? res_list[r+1] : none;
+        AssignBackboneTorsions(prev, res_list[r], next);
+        if (next.IsValid()) {
+          AssignBackboneTorsions(res_list[r], next,
+                                 r+2 < n ? res_list[r+2] : none);
         }
       }
-      prev = residue;
     }
-    if (residues.empty() || !this->GetAssignTorsions()) {
-      continue;
+  }
+  if (log_diags) {
+    for (Diagnostics::diag_iterator i = diags->diags_begin(),
+         e = diags->diags_end(); i != e; ++i) {
+      LOG_WARNING((*i)->Format(false));
+    }
+  }
+  return diags;
+}
+
+bool RuleBasedProcessor::ProcessResidue(DiagnosticsPtr diags,
+                                        mol::ResidueHandle residue,
+                                        mol::ResidueHandle prev) const
+{
+  mol::AtomHandleList atoms_to_connect;
+  CompoundPtr compound = lib_->FindCompound(residue.GetName(), Compound::PDB);
+  if (!compound && this->GetConnect()) {
+    // process unknown residue...
+    this->ProcessUnkResidue(diags, residue, atoms_to_connect);
+    for (mol::AtomHandleList::iterator k = atoms_to_connect.begin(),
+         e3=atoms_to_connect.end(); k!= e3; ++k) {
+      this->DistanceBasedConnect(*k);
+    }
+    return false;
+  }
+  this->ReorderAtoms(residue, compound, this->GetFixElement());  
+  bool unks = this->HasUnknownAtoms(residue, compound, 
+                                    this->GetStrictHydrogens());
+  if (unks) {
+    mol::AtomHandleList unk_atoms;
+    unk_atoms = GetUnknownAtomsOfResidue(residue, compound, 
+                                         this->GetStrictHydrogens());
+    this->ProcessUnkAtoms(diags, residue, unk_atoms, atoms_to_connect);
+    residue.SetChemClass(mol::ChemClass(mol::ChemClass::UNKNOWN));
+    residue.SetChemType(mol::ChemType(mol::ChemType::UNKNOWN));
+    residue.SetOneLetterCode('?');
+  } else {
+    this->FillResidueProps(residue, compound);
+  }
+  if (this->GetConnect()) {
+    this->ConnectAtomsOfResidue(residue, compound, 
+                                this->GetStrictHydrogens());
+    if (this->GetConnectAminoAcids())
+      this->ConnectResidues(prev, residue);
+    for (mol::AtomHandleList::iterator k = atoms_to_connect.begin(),
+         e3=atoms_to_connect.end(); k!= e3; ++k) {
+      this->DistanceBasedConnect(*k);
+    }
+    if (!this->GetStrictHydrogens()) {
+      mol::AtomHandleList atoms = residue.GetAtomList();
+      for (mol::AtomHandleList::iterator k = atoms.begin(),
+           e3 = atoms.end(); k != e3; ++k) {
+        const String& ele = k->GetElement();
+        if ((ele == "D" || ele == "H") && k->GetBondCount() == 0) {
+          this->DistanceBasedConnect(*k);
+        }
+      }
     }
-    AssignBackboneTorsions(residues);
   }
+  return true;
 }
 
 void RuleBasedProcessor::ProcessUnkResidue(DiagnosticsPtr diags,
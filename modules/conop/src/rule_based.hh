@@ -86,7 +86,21 @@ public:
   }
 
   virtual String ToString() const;
+
+  /// \brief process only the given residues
+  ///
+  /// Meant for reprocessing residues of an already processed entity after
+  /// they have been modified, e.g. after removing atoms. Residues are
+  /// processed as in Process() and connected to their neighbours in the
+  /// chain. Backbone torsions are assigned for the given residues and the
+  /// residues following them, once all given residues are processed. The
+  /// order of \p residues does not matter. All other residues stay
+  /// untouched otherwise.
+  DiagnosticsPtr ProcessResidues(const mol::ResidueHandleList& residues,
+                                 bool log_diags=true) const;
 protected:
+  bool ProcessResidue(DiagnosticsPtr diags, mol::ResidueHandle residue,
+                      mol::ResidueHandle prev) const;
   void ProcessUnkResidue(DiagnosticsPtr diags,
                          mol::ResidueHandle res, 
                          mol::AtomHandleList& remaining) const;
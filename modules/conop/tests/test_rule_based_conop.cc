@@ -107,6 +107,69 @@ BOOST_AUTO_TEST_CASE(rule_based_connect)
 }
 
 
+EntityHandle make_two_glycines()
+{
+  return Builder()
+    .Chain("A")
+      .Residue("GLY")
+        .Atom("N", geom::Vec3(-8.22, 35.20, 22.39))
+        .Atom("CA", geom::Vec3(-8.28, 36.36, 21.49))
+        .Atom("C", geom::Vec3(-8.59, 35.93, 20.06))
+        .Atom("O", geom::Vec3(-7.88, 36.30, 19.12))
+      .Residue("GLY")
+        .Atom("N", geom::Vec3(-9.59, 35.13, 19.76))
+        .Atom("CA", geom::Vec3(-10.09, 34.23, 18.76))
+        .Atom("C", geom::Vec3(-11.29, 34.83, 18.26))
+        .Atom("O", geom::Vec3(-11.59, 35.93, 17.86))
+  ;
+}
+
+BOOST_AUTO_TEST_CASE(rule_based_process_residues)
+{
+  CompoundLibPtr lib = load_lib();
+  if (!lib) { return; }
+  RuleBasedProcessor rbc(lib);
+  EntityHandle ent = make_two_glycines();
+  ResidueHandleList residues = ent.GetResidueList();
+  ResidueHandleList to_process;
+  to_process.push_back(residues[1]);
+  rbc.ProcessResidues(to_process);
+  // only the second residue is processed
+  BOOST_CHECK_EQUAL(residues[0].GetOneLetterCode(), '?');
+  BOOST_CHECK(!mol::BondExists(residues[0].FindAtom("N"),
+                               residues[0].FindAtom("CA")));
+  BOOST_CHECK_EQUAL(residues[1].GetOneLetterCode(), 'G');
+  BOOST_CHECK(residues[1].IsPeptideLinking());
+  BOOST_CHECK(mol::BondExists(residues[1].FindAtom("N"),
+                              residues[1].FindAtom("CA")));
+  BOOST_CHECK(mol::BondExists(residues[1].FindAtom("CA"),
+                              residues[1].FindAtom("C")));
+  BOOST_CHECK(!residues[1].GetPhiTorsion());
+  // the first residue comes last, torsions of the second residue must be
+  // assigned nevertheless
+  to_process.push_back(residues[0]);
+  rbc.ProcessResidues(to_process);
+  BOOST_CHECK_EQUAL(residues[0].GetOneLetterCode(), 'G');
+  BOOST_CHECK(mol::BondExists(residues[0].FindAtom("N"),
+                              residues[0].FindAtom("CA")));
+  BOOST_CHECK(mol::BondExists(residues[0].FindAtom("C"),
+                              residues[1].FindAtom("N")));
+  BOOST_CHECK(residues[1].GetPhiTorsion());
+  BOOST_CHECK(residues[1].GetOmegaTorsion());
+
+  // neighbours not in the list get their torsions too
+  ent = make_two_glycines();
+  residues = ent.GetResidueList();
+  to_process.clear();
+  to_process.push_back(residues[1]);
+  rbc.ProcessResidues(to_process);
+  BOOST_CHECK(!residues[1].GetPhiTorsion());
+  to_process.clear();
+  to_process.push_back(residues[0]);
+  rbc.ProcessResidues(to_process);
+  BOOST_CHECK(residues[1].GetPhiTorsion());
+}
+
 BOOST_AUTO_TEST_CASE(rule_based_unk_atoms)
 {
   CompoundLibPtr lib = load_lib();
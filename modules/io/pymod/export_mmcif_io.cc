@@ -559,6 +559,8 @@ void export_mmcif_io()
     .def("GetPDBMMCifChainTr", &MMCifInfo::GetPDBMMCifChainTr)
     .def("AddMMCifEntityIdTr", &MMCifInfo::AddMMCifEntityIdTr)
     .def("GetMMCifEntityIdTr", &MMCifInfo::GetMMCifEntityIdTr)
+    .def("BuildEntityKeyedSeqRes", &MMCifInfo::BuildEntityKeyedSeqRes,
+         (arg("seqres")))
     .def("SetRevisionsDateOriginal", &MMCifInfo::SetRevisionsDateOriginal)
     .def("AddRevision", &MMCifInfo::AddRevision,
          (arg("num"), arg("date"), arg("status"), arg("major")=-1,
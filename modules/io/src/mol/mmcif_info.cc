@@ -17,6 +17,7 @@
 // 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
 //------------------------------------------------------------------------------
 
+#include <set>
 #include <ost/io/io_exception.hh>
 #include <ost/io/mol/mmcif_info.hh>
 #include <ost/log.hh>
@@ -102,6 +103,21 @@ String MMCifInfo::GetMMCifEntityIdTr(String cif) const
   return tr_it->second;
 }
 
+seq::SequenceList
+MMCifInfo::BuildEntityKeyedSeqRes(const seq::SequenceList& seqres) const
+{
+  seq::SequenceList entity_seqres = seq::CreateSequenceList();
+  std::set<String> processed;
+  for (int i = 0; i < seqres.GetCount(); ++i) {
+    String entity_id = this->GetMMCifEntityIdTr(seqres[i].GetName());
+    if (processed.insert(entity_id).second) {
+      entity_seqres.AddSequence(seq::CreateSequence(entity_id,
+                                              seqres[i].GetGaplessString()));
+    }
+  }
+  return entity_seqres;
+}
+
 void MMCifInfo::AddAuthorsToCitation(StringRef id, std::vector<String> list,
                                      bool fault_tolerant)
 {
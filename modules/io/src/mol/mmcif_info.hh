@@ -1104,6 +1104,16 @@ public:
   /// \return entity ID as used by the mmCIF file (label_entity_id)
   String GetMMCifEntityIdTr(String cif) const;
 
+  /// \brief Get SEQRES with entity IDs as sequence names
+  ///
+  /// SEQRES as read from mmCIF relate to chain names (label_asym_id). The
+  /// first sequence of every entity in \p seqres is copied with the entity ID
+  /// as name, order is preserved.
+  ///
+  /// \param seqres sequences with chain names (label_asym_id) as names
+  /// \return sequences with entity IDs (label_entity_id) as names
+  seq::SequenceList BuildEntityKeyedSeqRes(const seq::SequenceList& seqres) const;
+
   /// \brief Add a biounit
   ///
   /// \param bu biounit to be added
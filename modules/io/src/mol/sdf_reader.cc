@@ -410,10 +410,13 @@ void SDFReader::AddBond(const bond_data& bond_tuple, int line_num, mol::EntityHa
 
   mol::AtomHandle first,second;
 
-  first = ent.FindAtom(curr_chain_.GetName(), mol::ResNum(residue_count_), 
-                       first_name);
-  second = ent.FindAtom(curr_chain_.GetName(), mol::ResNum(residue_count_), 
-                        second_name);
+  // bonds are always within the molecule that is currently read. Looking up
+  // the atoms in the entity would search the chain by name every time, which
+  // scales with the number of molecules that have been read so far.
+  if (curr_residue_.IsValid()) {
+    first = curr_residue_.FindAtom(first_name);
+    second = curr_residue_.FindAtom(second_name);
+  }
 
   if (first.IsValid() && second.IsValid()) {
     bond = editor.Connect(first, second);
@@ -46,7 +46,7 @@ StarParser::StarParser(std::istream& stream, bool items_as_row):
 }
 
 StarParser::StarParser(const String& filename, bool items_as_row):
-  fstream_(filename.c_str()), filename_(filename),
+  filename_(filename),
   line_num_(0), has_current_line_(false), current_line_(),
   items_row_header_(), file_open_(true),
   items_row_values_()
@@ -57,6 +57,21 @@ StarParser::StarParser(const String& filename, bool items_as_row):
     stream_.push(boost::iostreams::gzip_decompressor());
   }
 
+  // read from a memory mapping of the file, which saves copying the data
+  // through the buffers of the file stream. Mapping is not possible for
+  // e.g. empty files or special files, fall back to a plain file stream
+  // in that case.
+  try {
+    mapped_file_.open(filename);
+  } catch (std::exception&) {
+    mapped_file_.close();
+  }
+  if (mapped_file_.is_open()) {
+    stream_.push(mapped_file_);
+    return;
+  }
+
+  fstream_.open(filename.c_str());
   stream_.push(fstream_);
 
   if (!fstream_) {
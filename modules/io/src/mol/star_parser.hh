@@ -24,6 +24,7 @@
   Author: Marco Biasini
  */
 #include <boost/iostreams/filtering_stream.hpp>
+#include <boost/iostreams/device/mapped_file.hpp>
 
 #include <iostream>
 #include <fstream>
@@ -299,6 +300,7 @@ private:
   void DiagnoseUnknown();
   bool ParseMultilineValue(String& value, bool skip=false);
   std::ifstream fstream_;
+  boost::iostreams::mapped_file_source mapped_file_;
   boost::iostreams::filtering_stream<boost::iostreams::input> stream_;
   String        filename_;
   int           line_num_;
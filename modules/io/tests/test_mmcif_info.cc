@@ -356,5 +356,28 @@ BOOST_AUTO_TEST_CASE(mmcif_info)
   BOOST_TEST_MESSAGE("  done.");
 }
 
+BOOST_AUTO_TEST_CASE(mmcif_info_entity_seqres)
+{
+  BOOST_TEST_MESSAGE("  Running mmcif_info_entity_seqres tests...");
+
+  MMCifInfo info = MMCifInfo();
+  info.AddMMCifEntityIdTr("A", "1");
+  info.AddMMCifEntityIdTr("B", "2");
+  info.AddMMCifEntityIdTr("C", "1");
+
+  seq::SequenceList seqres = seq::CreateSequenceList();
+  seqres.AddSequence(seq::CreateSequence("A", "AAA"));
+  seqres.AddSequence(seq::CreateSequence("B", "BBB"));
+  seqres.AddSequence(seq::CreateSequence("C", "AAA"));
+  seq::SequenceList entity_seqres = info.BuildEntityKeyedSeqRes(seqres);
+  BOOST_CHECK(entity_seqres.GetCount() == 2);
+  BOOST_CHECK(entity_seqres[0].GetName() == "1");
+  BOOST_CHECK(entity_seqres[0].GetGaplessString() == "AAA");
+  BOOST_CHECK(entity_seqres[1].GetName() == "2");
+  BOOST_CHECK(entity_seqres[1].GetGaplessString() == "BBB");
+
+  BOOST_TEST_MESSAGE("  done.");
+}
+
 
 BOOST_AUTO_TEST_SUITE_END();
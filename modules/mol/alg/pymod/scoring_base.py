@@ -1,8 +1,25 @@
+import os
+from collections import OrderedDict
+
+import numpy as np
+
 import ost
 from ost import io
 from ost import conop
 from ost import mol
-from ost import seq
+
+
+# CleanHydrogens is called for every structure that gets prepared for scoring.
+# The processor only depends on the compound library, no need to construct a
+# new one as long as the same library is passed.
+_processor_cache = (None, None)
+
+
+def _GetProcessor(clib):
+    global _processor_cache
+    if _processor_cache[0] is not clib:
+        _processor_cache = (clib, conop.RuleBasedProcessor(clib))
+    return _processor_cache[1]
 
 
 def CleanHydrogens(ent, clib):
@@ -21,22 +38,105 @@ def CleanHydrogens(ent, clib):
     :type clib: :class:`ost.conop.CompoundLib`
     :returns: Cleaned and re-processed ent
     """
-    cleaned_ent = mol.CreateEntityFromView(ent.Select(
-        "ele != H and ele != D"), include_exlusive_atoms=False)
+    cleaned_ent = mol.CreateEntityFromView(mol.ExcludeElements(ent,
+        ["H", "D"]), include_exlusive_atoms=False)
     # process again to set missing residue properties due to non standard
     # hydrogens
-    processor = conop.RuleBasedProcessor(clib)
+    processor = _GetProcessor(clib)
     processor.Process(cleaned_ent)
     return cleaned_ent
 
 
+def _CleanLoadedHydrogens(ent, clib):
+    """ Same as :func:`CleanHydrogens` for entities fresh from a loader
+
+    The loader already processed *ent*. Without any hydrogens, there are no
+    residue properties to fix and *ent* is returned as is instead of a
+    re-processed copy. Otherwise, only residues that lost atoms are
+    re-processed, the properties of all other residues are copied over.
+    """
+    if not mol.HasElements(ent, ["H", "D"]):
+        return ent
+    view = mol.ExcludeElements(ent, ["H", "D"])
+    cleaned_ent = mol.CreateEntityFromView(view, include_exlusive_atoms=False)
+    # residues in cleaned_ent are in the same order as in view
+    dirty_residues = [r for r_view, r in zip(view.residues,
+                                             cleaned_ent.residues)
+                      if r_view.GetAtomCount() != r_view.handle.GetAtomCount()]
+    processor = _GetProcessor(clib)
+    processor.ProcessResidues(dirty_residues)
+    return cleaned_ent
+
+
+# Scoring pipelines commonly prepare the same mmCIF file more than once, e.g.
+# with different flags. Keep the last few loaded and hydrogen cleaned
+# structures around. Key: (realpath, mtime, size, fault_tolerant, clib),
+# value: (mmcif_entity, mmcif_seqres, mmcif_info)
+# Can be bypassed with the cache parameter of MMCIFPrep and emptied with
+# ClearMMCIFPrepCache.
+_mmcif_cache = OrderedDict()
+_mmcif_cache_size = 4
+
+
+def _LoadCleanMMCIF(mmcif_path, fault_tolerant, clib, cache):
+    """ Loads *mmcif_path* and removes hydrogens, optionally cached
+
+    If *cache* is True, the returned entity might be shared with the cache and
+    must not be modified.
+    """
+    key = None
+    if cache:
+        try:
+            st = os.stat(mmcif_path)
+            key = (os.path.realpath(mmcif_path), st.st_mtime_ns, st.st_size,
+                   fault_tolerant, clib)
+        except OSError:
+            # let the loader report the problem
+            pass
+
+    if key is not None and key in _mmcif_cache:
+        _mmcif_cache.move_to_end(key)
+        return _mmcif_cache[key]
+
+    # increase loglevel, as we would pollute the info log with weird stuff
+    ost.PushVerbosityLevel(ost.LogLevel.Error)
+    try:
+        mmcif_entity, mmcif_seqres, mmcif_info = \
+        io.LoadMMCIF(mmcif_path, seqres=True, info=True,
+                     fault_tolerant=fault_tolerant)
+    finally:
+        # restore old loglevel, also if loading fails
+        ost.PopVerbosityLevel()
+
+    mmcif_entity = _CleanLoadedHydrogens(mmcif_entity, clib)
+
+    if key is not None:
+        _mmcif_cache[key] = (mmcif_entity, mmcif_seqres, mmcif_info)
+        while len(_mmcif_cache) > _mmcif_cache_size:
+            _mmcif_cache.popitem(last=False)
+    return (mmcif_entity, mmcif_seqres, mmcif_info)
+
+
+def ClearMMCIFPrepCache():
+    """ Scoring helper - Releases all structures cached by :func:`MMCIFPrep`
+    """
+    _mmcif_cache.clear()
+
+
 def MMCIFPrep(mmcif_path, biounit=None, extract_nonpoly=False,
-              fault_tolerant=False, extract_seqres_mapping=False):
+              fault_tolerant=False, extract_seqres_mapping=False,
+              materialize=True, cache=True):
     """ Scoring helper - Prepares input from mmCIF
 
     Only performs gentle cleanup of hydrogen atoms. Further cleanup is delegated
     to scoring classes.
 
+    By default, the last few loaded and hydrogen cleaned structures are cached,
+    preparing the same file again, e.g. with different flags, does not parse
+    it again. The cache is keyed on path, modification time and size of
+    *mmcif_path*. It can be bypassed with *cache* and emptied with
+    :func:`ClearMMCIFPrepCache`. The cached structures are never modified.
+
     Depending on input flags, the following outputs can be retrieved:
 
     * poly_ent (:class:`ost.mol.EntityHandle`): An OpenStructure entity with only
@@ -44,6 +144,10 @@ def MMCIFPrep(mmcif_path, biounit=None, extract_nonpoly=False,
       If _entity.type is not defined for every chain, a warning is logged
       and the returned poly_ent is a selection for peptide and nucleotide
       residues as defined in the chemical component dictionary.
+      If *materialize* is False, poly_ent is a :class:`ost.mol.EntityView`
+      of the loaded structure instead of a separate entity. Without *biounit*
+      and with *cache* enabled, this is the cached structure which must not
+      be modified.
     * non_poly_entities (:class:`list` of :class:`ost.mol.EntityHandle`):
       OpenStructure entities representing all non-polymer (ligand) entities.
       This is based on _entity.type extracted from *mmcif_path*. If _entity.type
@@ -67,6 +171,16 @@ def MMCIFPrep(mmcif_path, biounit=None, extract_nonpoly=False,
     :type fault_tolerant: :class:`bool`
     :param extract_seqres_mapping: Controls return value
     :type extract_seqres_mapping: :class:`bool`
+    :param materialize: Whether poly_ent is copied into a separate
+                        :class:`ost.mol.EntityHandle`. Returning the
+                        :class:`ost.mol.EntityView` saves a copy of all
+                        polymer atoms if the view is sufficient for the
+                        caller.
+    :type materialize: :class:`bool`
+    :param cache: Whether to use the cache described above. Disable it when
+                  preparing many distinct files, to neither keep their
+                  structures alive nor copy them.
+    :type cache: :class:`bool`
     :returns: poly_ent if *extract_nonpoly*/*extract_seqres_mapping* are False.
               (poly_ent, non_poly_entities) if *extract_nonpoly* is True.
               (poly_ent, seqres, trg_seqres_mapping) if *extract_seqres_mapping*
@@ -87,14 +201,8 @@ def MMCIFPrep(mmcif_path, biounit=None, extract_nonpoly=False,
     seqres = None
     trg_seqres_mapping = None
 
-    # increase loglevel, as we would pollute the info log with weird stuff
-    ost.PushVerbosityLevel(ost.LogLevel.Error)
-    mmcif_entity, mmcif_seqres, mmcif_info = io.LoadMMCIF(mmcif_path, seqres=True, info=True,
-                                                          fault_tolerant=fault_tolerant)
-    # restore old loglevel and return
-    ost.PopVerbosityLevel()
-
-    mmcif_entity = CleanHydrogens(mmcif_entity, clib)
+    mmcif_entity, mmcif_seqres, mmcif_info = \
+    _LoadCleanMMCIF(mmcif_path, fault_tolerant, clib, cache)
 
     # construct biounit if necessary
     if biounit is not None:
@@ -108,27 +216,32 @@ def MMCIFPrep(mmcif_path, biounit=None, extract_nonpoly=False,
             raise RuntimeError(f"Specified biounit '{biounit}' not in "
                                f"{mmcif_path}")
 
-    # check if we have entity types defined for each chain
+    # resolve the chain names in the asymmetric unit and their entity ids once
+    # for all chains, we need them over and over again
+    if biounit is not None:
+        # CreateBU attaches the name of the originating AU chain, no need
+        # to parse it from the biounit chain names (e.g. 1.YOLO)
+        chain_info = [(ch, ch.GetStringProp("au_chain_name"))
+                      for ch in mmcif_entity.chains]
+    else:
+        chain_info = [(ch, ch.name) for ch in mmcif_entity.chains]
+    au_cnames = {ch.name: cname for ch, cname in chain_info}
+    get_entity_id = mmcif_info.GetMMCifEntityIdTr
+    entity_id_map = {cname: get_entity_id(cname) for _, cname in chain_info}
+
+    # check if we have entity types defined for each chain and collect polymer
+    # chains on the way. The loaded entity might be cached, it must not be
+    # modified, e.g. by marking chains with properties.
+    entity_ids = set(mmcif_info.GetEntityIds())
+    polymer_entity_ids = set(mmcif_info.GetEntityIdsOfType("polymer"))
     missing_entity_types = list()
-    for ch in mmcif_entity.chains:
-        cname = None
-        if biounit is not None:
-            # if a biounit is constructed, you get chain names like: 1.YOLO
-            # we cannot simply split by '.' since '.' is an allowed character
-            # in chain names. => split by first occurence
-            dot_index = ch.name.find('.')
-            if dot_index == -1:
-                cname = ch.name
-            else:
-                cname = ch.name[dot_index+1:]
-        else:
-            cname = ch.name
-        try:
-            entity_id = mmcif_info.GetMMCifEntityIdTr(cname)
-            # the following raises if there is no desc for entity_id
-            entity_desc = mmcif_info.GetEntityDesc(entity_id)
-        except:
+    polymer_chains = list()
+    for ch, cname in chain_info:
+        entity_id = entity_id_map[cname]
+        if entity_id not in entity_ids:
             missing_entity_types.append(cname)
+        elif entity_id in polymer_entity_ids:
+            polymer_chains.append(ch)
 
     if len(missing_entity_types) > 0:
         msg = f"mmCIF file does not define _entity.type for chains "
@@ -145,27 +258,19 @@ def MMCIFPrep(mmcif_path, biounit=None, extract_nonpoly=False,
         msg += f"tolerant mode)."
         ost.LogWarning(msg)
 
-        poly_sel = mmcif_entity.Select("peptide=true or nucleotide=true")
-        poly_ent = mol.CreateEntityFromView(poly_sel, True)
+        poly_sel = mol.SelectPolymerResidues(mmcif_entity)
     else:
-        polymer_entity_ids = mmcif_info.GetEntityIdsOfType("polymer")
-        for ch in mmcif_entity.chains:
-            cname = None
-            if biounit is not None:
-                # if a biounit is constructed, you get chain names like: 1.YOLO
-                # we cannot simply split by '.' since '.' is an allowed character
-                # in chain names. => split by first occurence
-                dot_index = ch.name.find('.')
-                if dot_index == -1:
-                    cname = ch.name
-                else:
-                    cname = ch.name[dot_index+1:]
-            else:
-                cname = ch.name
-            if mmcif_info.GetMMCifEntityIdTr(cname) in polymer_entity_ids:
-                ch.SetIntProp("poly", 1)
-        poly_sel = mmcif_entity.Select("gcpoly:0=1")
+        # build the view from the polymer chains directly, bonds are added if
+        # both partners are part of the view, exactly as a selection would do
+        poly_sel = mmcif_entity.CreateEmptyView()
+        for ch in polymer_chains:
+            poly_sel.AddChain(ch, mol.INCLUDE_ALL)
+        poly_sel.AddAllInclusiveBonds()
+
+    if materialize:
         poly_ent = mol.CreateEntityFromView(poly_sel, True)
+    else:
+        poly_ent = poly_sel
 
     if extract_nonpoly:
         if len(missing_entity_types) > 0:
@@ -175,36 +280,23 @@ def MMCIFPrep(mmcif_path, biounit=None, extract_nonpoly=False,
             msg += f"chains."
             raise RuntimeError(msg)
 
-        non_polymer_entity_ids = mmcif_info.GetEntityIdsOfType("non-polymer")
-        nonpoly_id = 1
-        for ch in mmcif_entity.chains:
-            cname = None
-            if biounit is not None:
-                # if a biounit is constructed, you get chain names like: 1.YOLO
-                # we cannot simply split by '.' since '.' is an allowed character
-                # in chain names. => split by first occurence
-                dot_index = ch.name.find('.')
-                if dot_index == -1:
-                    cname = ch.name
-                else:
-                    cname = ch.name[dot_index+1:]
-            else:
-                cname = ch.name
-            if mmcif_info.GetMMCifEntityIdTr(cname) in non_polymer_entity_ids:
-                ch.SetIntProp("nonpolyid", nonpoly_id)
-                nonpoly_id += 1
-
+        non_polymer_entity_ids = set(mmcif_info.GetEntityIdsOfType("non-polymer"))
         non_poly_entities = list()
-        for i in range(1,nonpoly_id):
-            view = mmcif_entity.Select(f"gcnonpolyid:0={i}")
-            if view.GetResidueCount() != 1:
+        for ch, cname in chain_info:
+            if entity_id_map[cname] not in non_polymer_entity_ids:
+                continue
+            # the residue count of a chain is readily available, check it
+            # before building any view
+            n_residues = ch.GetResidueCount()
+            if n_residues != 1:
                 raise RuntimeError(f"Expected non-polymer entities in "
                                    f"{mmcif_path} to contain exactly 1 "
-                                   f"residue. Got {view.GetResidueCount()} "
-                                   f"in chain {view.chains[0].name}")
-            compound = clib.FindCompound(view.residues[0].name)
+                                   f"residue. Got {n_residues} "
+                                   f"in chain {ch.name}")
+            rname = ch.residues[0].name
+            compound = clib.FindCompound(rname)
             if compound is None:
-                error_msg = f"\"{view.residues[0].name}\" is not available in " \
+                error_msg = f"\"{rname}\" is not available in " \
                             f"the compound library."
                 if fault_tolerant:
                     error_msg += f"A distance-based heuristic was used to " \
@@ -217,39 +309,30 @@ def MMCIFPrep(mmcif_path, biounit=None, extract_nonpoly=False,
                                  f"to connect the ligand atoms."
                     raise RuntimeError(error_msg)
 
+            # build the view for a non-polymer chain directly instead of going
+            # through a query which would have to look at the full entity.
+            # Only bonds within the chain are added, exactly as a selection
+            # would do.
+            view = mmcif_entity.CreateEmptyView()
+            view.AddChain(ch, mol.INCLUDE_ALL)
+            for a in ch.atoms:
+                for b in a.bonds:
+                    if b.first == a and b.second.chain == ch:
+                        view.AddBond(b)
             non_poly_entities.append(mol.CreateEntityFromView(view, True))
 
     if extract_seqres_mapping:
         # mmcif seqres is a list of sequences that relates to
         # chain names in the assymetric unit. What we want is a list
         # of sequences that relate to the underlying entities.
-        seqres = seq.CreateSequenceList()
-        seqres_processed = set()
-
-        for s in mmcif_seqres:
-            entity_id = mmcif_info.GetMMCifEntityIdTr(s.GetName())
-            if entity_id not in seqres_processed:
-                seqres_processed.add(entity_id)
-                seqres.AddSequence(seq.CreateSequence(entity_id, s.GetGaplessString()))
+        seqres = mmcif_info.BuildEntityKeyedSeqRes(mmcif_seqres)
+        seqres_processed = set([s.GetName() for s in seqres])
 
         # check if we have SEQRES defined for each polymer chain
         missing_seqres = list()
         for ch in poly_ent.chains:
-            cname = None
-            if biounit is not None:
-                # if a biounit is constructed, you get chain names like: 1.YOLO
-                # we cannot simply split by '.' since '.' is an allowed character
-                # in chain names. => split by first occurence
-                dot_index = ch.name.find('.')
-                if dot_index == -1:
-                    cname = ch.name
-                else:
-                    cname = ch.name[dot_index+1:]
-            else:
-                cname = ch.name
-            
-            entity_id = mmcif_info.GetMMCifEntityIdTr(cname)
-            if entity_id not in seqres_processed:
+            cname = au_cnames[ch.name]
+            if entity_id_map[cname] not in seqres_processed:
                 missing_seqres.append(cname)
 
         if len(missing_seqres) > 0:
@@ -269,19 +352,8 @@ def MMCIFPrep(mmcif_path, biounit=None, extract_nonpoly=False,
             seqres = None
             trg_seqres_mapping = None
         else:
-            trg_seqres_mapping = dict()
-            if biounit is None:
-                cnames = [ch.name for ch in poly_ent.chains]
-                for cname in cnames:
-                    trg_seqres_mapping[cname] = mmcif_info.GetMMCifEntityIdTr(cname)
-            else:
-                bu_cnames = [ch.name for ch in poly_ent.chains]
-                au_cnames = list()
-                for bu_cname in bu_cnames:
-                    dot_idx = bu_cname.index(".")
-                    au_cnames.append(bu_cname[dot_idx + 1 :])
-                for au_cname, bu_cname in zip(au_cnames, bu_cnames):
-                    trg_seqres_mapping[bu_cname] = mmcif_info.GetMMCifEntityIdTr(au_cname)
+            trg_seqres_mapping = {ch.name: entity_id_map[au_cnames[ch.name]]
+                                  for ch in poly_ent.chains}
 
     if extract_nonpoly and extract_seqres_mapping:
         return (poly_ent, non_poly_entities, seqres, trg_seqres_mapping)
@@ -315,11 +387,74 @@ def PDBPrep(pdb_path, fault_tolerant=False):
 
     # increase loglevel, as we would pollute the info log with weird stuff
     ost.PushVerbosityLevel(ost.LogLevel.Error)
-    pdb_entity = io.LoadPDB(pdb_path, fault_tolerant=fault_tolerant)
-    # restore old loglevel and return
-    ost.PopVerbosityLevel()
-    pdb_entity = CleanHydrogens(pdb_entity, clib)
+    try:
+        pdb_entity = io.LoadPDB(pdb_path, fault_tolerant=fault_tolerant)
+    finally:
+        # restore old loglevel, also if loading fails
+        ost.PopVerbosityLevel()
+    pdb_entity = _CleanLoadedHydrogens(pdb_entity, clib)
 
     return pdb_entity
 
-__all__ = ('CleanHydrogens', 'MMCIFPrep', 'PDBPrep')
+
+def AtomArrays(ent):
+    """ Scoring helper - Returns per atom data of *ent* as numpy arrays
+
+    Intended for downstream code that operates on all atoms of the
+    structures returned by :func:`MMCIFPrep`/:func:`PDBPrep` and is better
+    expressed with numpy operations (or JIT compiled functions, e.g. with
+    numba) than with Python loops over atoms. Atoms are ordered as they are
+    iterated in *ent*, i.e. chain by chain and residue by residue.
+
+    The returned :class:`dict` has the following keys:
+
+    * "xyz": :class:`np.ndarray` of shape (n_atoms, 3) and dtype float32 with
+      atom positions
+    * "elem_code": :class:`np.ndarray` of shape (n_atoms,) and dtype uint8,
+      index of atom element in "elements"
+    * "elements": :class:`list` of :class:`str`, the unique elements of *ent*
+      in order of first occurence
+    * "res_index": :class:`np.ndarray` of shape (n_atoms,) and dtype int32,
+      index of residue in *ent.residues*
+    * "chain_index": :class:`np.ndarray` of shape (n_atoms,) and dtype int32,
+      index of chain in *ent.chains*
+
+    :param ent: Structure to extract data from
+    :type ent: :class:`ost.mol.EntityHandle`/:class:`ost.mol.EntityView`
+    :returns: :class:`dict` as described above
+    """
+    # collect plain Python lists and convert each of them with one call,
+    # assigning to numpy arrays item by item is much slower
+    xyz = list()
+    atom_elements = list()
+    res_index = list()
+    chain_index = list()
+    r_idx = 0
+    for ch_idx, ch in enumerate(ent.chains):
+        for r in ch.residues:
+            atoms = r.atoms
+            for a in atoms:
+                p = a.GetPos()
+                xyz.append((p[0], p[1], p[2]))
+                atom_elements.append(a.GetElement())
+            res_index.extend([r_idx] * len(atoms))
+            chain_index.extend([ch_idx] * len(atoms))
+            r_idx += 1
+
+    # codes are assigned in order of first occurence
+    elem_codes = dict()
+    elem_code = [elem_codes.setdefault(e, len(elem_codes))
+                 for e in atom_elements]
+    elements = list(elem_codes.keys())
+
+    xyz = np.asarray(xyz, dtype=np.float32).reshape((-1, 3))
+    elem_code = np.asarray(elem_code, dtype=np.uint8)
+    res_index = np.asarray(res_index, dtype=np.int32)
+    chain_index = np.asarray(chain_index, dtype=np.int32)
+
+    return {"xyz": xyz, "elem_code": elem_code, "elements": elements,
+            "res_index": res_index, "chain_index": chain_index}
+
+
+__all__ = ('CleanHydrogens', 'MMCIFPrep', 'ClearMMCIFPrepCache', 'PDBPrep',
+           'AtomArrays')
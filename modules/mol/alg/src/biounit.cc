@@ -359,6 +359,7 @@ ost::mol::EntityHandle CreateBU(const ost::mol::EntityHandle& asu,
         String bu_cname = bu_chains[chain_intvl][t_idx][c_idx];
         ost::mol::ChainHandle bu_ch = ed.InsertChain(bu_cname);
         ed.SetChainType(bu_ch, asu_ch.GetType());
+        bu_ch.SetStringProp("au_chain_name", au_cname);
         ost::mol::ResidueHandleList au_res_list = asu_ch.GetResidueList();
         for(auto res_it = au_res_list.begin();
             res_it != au_res_list.end(); ++res_it) {
@@ -41,6 +41,9 @@ class TestBioUnit(unittest.TestCase):
     self.assertEqual([ch.GetName() for ch in bu.chains],
                      ["1.A", "1.B", "1.C", "1.D", "1.E", "1.F",
                       "2.A", "2.B", "2.C", "2.D", "2.E", "2.F"])
+    self.assertEqual([ch.GetStringProp("au_chain_name") for ch in bu.chains],
+                     ["A", "B", "C", "D", "E", "F",
+                      "A", "B", "C", "D", "E", "F"])
 
     # extract copies of original assymetric units from biounit
     for ch in bu.chains:
@@ -3,6 +3,7 @@ import os
 
 import ost
 from ost import io
+from ost import conop
 from ost import seq
 from ost.mol.alg import scoring_base
 
@@ -20,6 +21,15 @@ class TestLigandScoringFancy(unittest.TestCase):
         self.assertEqual(cnames, ["A", "B", "C", "D"])
 
 
+        # test returning a view instead of a separate entity
+        poly_view = scoring_base.MMCIFPrep(_GetTestfilePath("1r8q.cif.gz"),
+                                           materialize=False)
+        self.assertTrue(isinstance(poly_view, ost.mol.EntityView))
+        cnames = [ch.name for ch in poly_view.chains]
+        self.assertEqual(cnames, ["A", "B", "C", "D"])
+        self.assertEqual(poly_view.GetAtomCount(), poly_ent.GetAtomCount())
+        self.assertEqual(poly_view.GetBondCount(), poly_ent.GetBondCount())
+
         # test enabling extract_nonpoly flag
         poly_ent, non_poly_entities = scoring_base.MMCIFPrep(_GetTestfilePath("1r8q.cif.gz"),
                                                              extract_nonpoly=True)
@@ -85,6 +95,100 @@ class TestLigandScoringFancy(unittest.TestCase):
         for k,v in trg_seqres_mapping.items():
             self.assertEqual(expected_trg_seqres_mapping[k], v)
 
+    def test_PDBPrepHydrogens(self):
+
+        # only residues that lost hydrogens are reprocessed when preparing
+        # loaded structures, the result must not differ from reprocessing
+        # everything
+        path = _GetTestfilePath("1aho.pdb")
+        ent = io.LoadPDB(path)
+        self.assertTrue(ent.Select("ele=H or ele=D").GetAtomCount() > 0)
+        ref = scoring_base.CleanHydrogens(ent, conop.GetDefaultLib())
+        prep = scoring_base.PDBPrep(path)
+        self.assertEqual(prep.Select("ele=H or ele=D").GetAtomCount(), 0)
+        self.assertEqual(prep.GetAtomCount(), ref.GetAtomCount())
+        self.assertEqual(prep.GetBondCount(), ref.GetBondCount())
+        self.assertEqual(prep.GetResidueCount(), ref.GetResidueCount())
+        for r_prep, r_ref in zip(prep.residues, ref.residues):
+            self.assertEqual(r_prep.GetQualifiedName(),
+                             r_ref.GetQualifiedName())
+            self.assertEqual(r_prep.one_letter_code, r_ref.one_letter_code)
+            self.assertEqual(r_prep.IsPeptideLinking(),
+                             r_ref.IsPeptideLinking())
+            self.assertEqual(r_prep.is_protein, r_ref.is_protein)
+            self.assertEqual(r_prep.GetPhiTorsion().IsValid(),
+                             r_ref.GetPhiTorsion().IsValid())
+            self.assertEqual(r_prep.GetPsiTorsion().IsValid(),
+                             r_ref.GetPsiTorsion().IsValid())
+
+    def test_MMCIFPrepCache(self):
+
+        def _Describe(result):
+            poly_ent, non_poly_entities, seqres, trg_seqres_mapping = result
+            return ([(ch.name, ch.GetAtomCount()) for ch in poly_ent.chains],
+                    poly_ent.GetBondCount(),
+                    [(ent.residues[0].name, ent.GetAtomCount())
+                     for ent in non_poly_entities],
+                    [(s.GetName(), s.GetGaplessString()) for s in seqres],
+                    trg_seqres_mapping)
+
+        def _ChainProps(ent):
+            return [(ch.name, sorted(ch.GetPropList())) for ch in ent.chains]
+
+        path = _GetTestfilePath("1r8q.cif.gz")
+        scoring_base.ClearMMCIFPrepCache()
+        cached_props = None
+        for biounit in [None, "1", None]:
+            # cache=False neither reads nor fills the cache
+            n_cached = len(scoring_base._mmcif_cache)
+            uncached = scoring_base.MMCIFPrep(path, biounit=biounit,
+                                              extract_nonpoly=True,
+                                              extract_seqres_mapping=True,
+                                              cache=False)
+            self.assertEqual(len(scoring_base._mmcif_cache), n_cached)
+            scoring_base.MMCIFPrep(path, biounit=biounit)
+            cached = scoring_base.MMCIFPrep(path, biounit=biounit,
+                                            extract_nonpoly=True,
+                                            extract_seqres_mapping=True)
+            self.assertEqual(len(scoring_base._mmcif_cache), 1)
+            self.assertEqual(_Describe(uncached), _Describe(cached))
+            cached_ent = list(scoring_base._mmcif_cache.values())[0][0]
+            if cached_props is None:
+                cached_props = _ChainProps(cached_ent)
+            # processing must not leak into the cached structure
+            self.assertEqual(_ChainProps(cached_ent), cached_props)
+
+        scoring_base.ClearMMCIFPrepCache()
+        self.assertEqual(len(scoring_base._mmcif_cache), 0)
+
+    def test_AtomArrays(self):
+
+        poly_ent = scoring_base.MMCIFPrep(_GetTestfilePath("1r8q.cif.gz"))
+        arrays = scoring_base.AtomArrays(poly_ent)
+        n_atoms = poly_ent.GetAtomCount()
+        self.assertEqual(arrays["xyz"].shape, (n_atoms, 3))
+        self.assertEqual(arrays["elem_code"].shape, (n_atoms,))
+        self.assertEqual(arrays["res_index"].shape, (n_atoms,))
+        self.assertEqual(arrays["chain_index"].shape, (n_atoms,))
+        self.assertEqual(arrays["res_index"][-1],
+                         poly_ent.GetResidueCount() - 1)
+        self.assertEqual(arrays["chain_index"][-1],
+                         poly_ent.GetChainCount() - 1)
+        residues = poly_ent.residues
+        chains = poly_ent.chains
+        for a_idx, a in enumerate(poly_ent.atoms):
+            r = residues[int(arrays["res_index"][a_idx])]
+            self.assertEqual(r.GetQualifiedName(),
+                             a.residue.GetQualifiedName())
+            ch = chains[int(arrays["chain_index"][a_idx])]
+            self.assertEqual(ch.name, a.chain.name)
+            p = a.GetPos()
+            self.assertAlmostEqual(arrays["xyz"][a_idx][0], p[0], places=3)
+            self.assertAlmostEqual(arrays["xyz"][a_idx][1], p[1], places=3)
+            self.assertAlmostEqual(arrays["xyz"][a_idx][2], p[2], places=3)
+            e = arrays["elements"][arrays["elem_code"][a_idx]]
+            self.assertEqual(e, a.GetElement())
+
 if __name__ == "__main__":
     from ost import testutils
     if testutils.DefaultCompoundLibIsSet():
@@ -81,6 +81,21 @@ EntityView create_view(const object& seq)
   return EntityView();
 }
 
+EntityView exclude_elements_a(const EntityHandle& ent, const object& elements)
+{
+  return ExcludeElements(ent, from_list<String>(elements));
+}
+
+EntityView exclude_elements_b(const EntityView& ent, const object& elements)
+{
+  return ExcludeElements(ent, from_list<String>(elements));
+}
+
+bool has_elements(const EntityHandle& ent, const object& elements)
+{
+  return HasElements(ent, from_list<String>(elements));
+}
+
 ResidueView (EntityView::*add_res_a)(const ResidueHandle&, 
                                      ViewAddFlags)=&EntityView::AddResidue;
 ResidueView (EntityView::*add_res_b)(const ResidueView&, 
@@ -214,6 +229,10 @@ void export_EntityView()
 
   def("CreateViewFromAtoms", create_view);
   def("CreateViewFromAtomList", create_view);
+  def("ExcludeElements", exclude_elements_a, (arg("ent"), arg("elements")));
+  def("ExcludeElements", exclude_elements_b, (arg("ent"), arg("elements")));
+  def("HasElements", has_elements, (arg("ent"), arg("elements")));
+  def("SelectPolymerResidues", &SelectPolymerResidues, (arg("ent")));
   
   def("CreateEntityFromView", &CreateEntityFromView,
       (arg("view"), arg("include_exlusive_atoms"), arg("handle")=EntityHandle()));
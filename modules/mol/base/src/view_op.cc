@@ -29,6 +29,8 @@
 #include <ost/mol/impl/residue_impl.hh>
 #include <ost/mol/impl/atom_impl.hh>
 #include <ost/mol/impl/torsion_impl.hh>
+#include <ost/mol/impl/connector_impl.hh>
+#include <ost/mol/bond_table.hh>
 #include "view_op.hh"
 
 namespace ost { namespace mol {
@@ -284,6 +286,214 @@ mol::EntityView CreateViewFromAtomList(const mol::AtomViewList& atoms)
 
 namespace {
 
+typedef BondTable<AtomView> BondTableType;
+
+bool is_excluded(const String& ele, const std::vector<String>& elements)
+{
+  for (std::vector<String>::const_iterator i=elements.begin(),
+       e=elements.end(); i!=e; ++i) {
+    if (*i==ele) {
+      return true;
+    }
+  }
+  return false;
+}
+
+void add_complete_bonds(const BondTableType& bond_table, EntityView& view)
+{
+  for (BondTableType::MapType::const_iterator i=bond_table.bonds.begin(),
+       e=bond_table.bonds.end(); i!=e; ++i) {
+    if (i->second.IsComplete()) {
+      view.AddBond(i->second.bond);
+    }
+  }
+}
+
+}
+
+EntityView ExcludeElements(const EntityHandle& ent,
+                           const std::vector<String>& elements)
+{
+  Profile prof("mol::ExcludeElements");
+  EntityView view=ent.CreateEmptyView();
+  // all atoms of the entity are considered, so a bond is part of the view
+  // exactly when the element of both partners is not excluded. There is no
+  // need to keep track of seen bonds in a bond table. Every bond is collected
+  // at its first atom to avoid duplicates.
+  BondHandleList bonds;
+  const impl::ChainImplList& chains=ent.Impl()->GetChainList();
+  for (impl::ChainImplList::const_iterator i=chains.begin(),
+       e=chains.end(); i!=e; ++i) {
+    ChainView chain;
+    bool c_added=false;
+    const impl::ResidueImplList& residues=(*i)->GetResidueList();
+    for (impl::ResidueImplList::const_iterator j=residues.begin(),
+         e2=residues.end(); j!=e2; ++j) {
+      ResidueView res;
+      bool r_added=false;
+      const impl::AtomImplList& atoms=(*j)->GetAtomList();
+      for (impl::AtomImplList::const_iterator k=atoms.begin(),
+           e3=atoms.end(); k!=e3; ++k) {
+        if (is_excluded((*k)->GetElement(), elements)) {
+          continue;
+        }
+        if (!c_added) {
+          c_added=true;
+          chain=view.AddChain(ChainHandle(*i));
+        }
+        if (!r_added) {
+          r_added=true;
+          res=chain.AddResidue(ResidueHandle(*j));
+        }
+        res.AddAtom(AtomHandle(*k));
+        const impl::ConnectorImplP& prim=(*k)->GetPrimaryConnector();
+        if (prim && prim->GetFirst()==*k &&
+            !is_excluded(prim->GetSecond()->GetElement(), elements)) {
+          bonds.push_back(BondHandle(prim));
+        }
+        const impl::ConnectorImplList& conn=(*k)->GetSecondaryConnectors();
+        for (impl::ConnectorImplList::const_iterator l=conn.begin(),
+             e4=conn.end(); l!=e4; ++l) {
+          if ((*l)->GetFirst()==*k &&
+              !is_excluded((*l)->GetSecond()->GetElement(), elements)) {
+            bonds.push_back(BondHandle(*l));
+          }
+        }
+      }
+    }
+  }
+  for (BondHandleList::const_iterator i=bonds.begin(),
+       e=bonds.end(); i!=e; ++i) {
+    view.AddBond(*i);
+  }
+  return view;
+}
+
+bool HasElements(const EntityHandle& ent, const std::vector<String>& elements)
+{
+  const impl::ChainImplList& chains=ent.Impl()->GetChainList();
+  for (impl::ChainImplList::const_iterator i=chains.begin(),
+       e=chains.end(); i!=e; ++i) {
+    const impl::ResidueImplList& residues=(*i)->GetResidueList();
+    for (impl::ResidueImplList::const_iterator j=residues.begin(),
+         e2=residues.end(); j!=e2; ++j) {
+      const impl::AtomImplList& atoms=(*j)->GetAtomList();
+      for (impl::AtomImplList::const_iterator k=atoms.begin(),
+           e3=atoms.end(); k!=e3; ++k) {
+        if (is_excluded((*k)->GetElement(), elements)) {
+          return true;
+        }
+      }
+    }
+  }
+  return false;
+}
+
+EntityView ExcludeElements(const EntityView& ent,
+                           const std::vector<String>& elements)
+{
+  Profile prof("mol::ExcludeElements");
+  EntityView view=ent.CreateEmptyView();
+  BondTableType bond_table;
+  const ChainViewList& chains=ent.GetChainList();
+  for (ChainViewList::const_iterator i=chains.begin(),
+       e=chains.end(); i!=e; ++i) {
+    ChainView chain;
+    bool c_added=false;
+    const ResidueViewList& residues=i->GetResidueList();
+    for (ResidueViewList::const_iterator j=residues.begin(),
+         e2=residues.end(); j!=e2; ++j) {
+      ResidueView res;
+      bool r_added=false;
+      const AtomViewList& atoms=j->GetAtomList();
+      for (AtomViewList::const_iterator k=atoms.begin(),
+           e3=atoms.end(); k!=e3; ++k) {
+        if (is_excluded(k->GetHandle().GetElement(), elements)) {
+          continue;
+        }
+        if (!c_added) {
+          c_added=true;
+          chain=view.AddChain(i->GetHandle());
+        }
+        if (!r_added) {
+          r_added=true;
+          res=chain.AddResidue(j->GetHandle());
+        }
+        AtomView atom=res.AddAtom(k->GetHandle());
+        BondHandleList bonds=k->GetBondList();
+        for (BondHandleList::const_iterator l=bonds.begin(),
+             e4=bonds.end(); l!=e4; ++l) {
+          bond_table.Update(*l, atom);
+        }
+      }
+    }
+  }
+  add_complete_bonds(bond_table, view);
+  return view;
+}
+
+namespace {
+
+bool is_polymer_residue(const impl::ResidueImplPtr& res)
+{
+  ChemClass chem_class=res->GetChemClass();
+  return chem_class.IsPeptideLinking() || chem_class.IsNucleotideLinking();
+}
+
+}
+
+EntityView SelectPolymerResidues(const EntityHandle& ent)
+{
+  Profile prof("mol::SelectPolymerResidues");
+  EntityView view=ent.CreateEmptyView();
+  // same as for ExcludeElements: a bond is part of the view exactly when both
+  // partners are in polymer residues. Every bond is collected at its first
+  // atom to avoid duplicates.
+  BondHandleList bonds;
+  const impl::ChainImplList& chains=ent.Impl()->GetChainList();
+  for (impl::ChainImplList::const_iterator i=chains.begin(),
+       e=chains.end(); i!=e; ++i) {
+    ChainView chain;
+    bool c_added=false;
+    const impl::ResidueImplList& residues=(*i)->GetResidueList();
+    for (impl::ResidueImplList::const_iterator j=residues.begin(),
+         e2=residues.end(); j!=e2; ++j) {
+      if (!is_polymer_residue(*j)) {
+        continue;
+      }
+      if (!c_added) {
+        c_added=true;
+        chain=view.AddChain(ChainHandle(*i));
+      }
+      chain.AddResidue(ResidueHandle(*j), ViewAddFlag::INCLUDE_ATOMS);
+      const impl::AtomImplList& atoms=(*j)->GetAtomList();
+      for (impl::AtomImplList::const_iterator k=atoms.begin(),
+           e3=atoms.end(); k!=e3; ++k) {
+        const impl::ConnectorImplP& prim=(*k)->GetPrimaryConnector();
+        if (prim && prim->GetFirst()==*k &&
+            is_polymer_residue(prim->GetSecond()->GetResidue())) {
+          bonds.push_back(BondHandle(prim));
+        }
+        const impl::ConnectorImplList& conn=(*k)->GetSecondaryConnectors();
+        for (impl::ConnectorImplList::const_iterator l=conn.begin(),
+             e4=conn.end(); l!=e4; ++l) {
+          if ((*l)->GetFirst()==*k &&
+              is_polymer_residue((*l)->GetSecond()->GetResidue())) {
+            bonds.push_back(BondHandle(*l));
+          }
+        }
+      }
+    }
+  }
+  for (BondHandleList::const_iterator i=bonds.begin(),
+       e=bonds.end(); i!=e; ++i) {
+    view.AddBond(*i);
+  }
+  return view;
+}
+
+namespace {
+
 // replicates chain, residue, atom hierarchy and bonds. torsions are not handled 
 // here.
 class Replicator : public EntityVisitor {
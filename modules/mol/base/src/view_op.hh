@@ -68,6 +68,48 @@ EntityView DLLEXPORT_OST_MOL CreateViewFromAtomList(const AtomHandleList& atoms)
 /// \relates EntityView
 EntityView DLLEXPORT_OST_MOL CreateViewFromAtomList(const AtomViewList& atoms);
 
+/// \brief create view with all atoms whose element is not in \p elements
+///
+/// Yields the same result as a selection with "ele!=H and ele!=D" for
+/// elements=["H", "D"], but the atoms are directly scanned instead of going
+/// through the query machinery. Chains and residues without any remaining
+/// atoms are not part of the returned view. Bonds are included if both bond
+/// partners remain.
+///
+/// \relates EntityView
+EntityView DLLEXPORT_OST_MOL ExcludeElements(const EntityHandle& ent,
+                                             const std::vector<String>& elements);
+
+/// \brief create view with all atoms whose element is not in \p elements
+///
+/// Same as ExcludeElements(const EntityHandle&, const std::vector<String>&)
+/// but only the chains, residues, atoms and bonds present in \p ent are
+/// considered.
+///
+/// \relates EntityView
+EntityView DLLEXPORT_OST_MOL ExcludeElements(const EntityView& ent,
+                                             const std::vector<String>& elements);
+
+/// \brief check whether \p ent contains any atom with element in \p elements
+///
+/// Stops at the first match. Cheap test to decide whether
+/// ExcludeElements() would remove anything at all.
+///
+/// \relates EntityHandle
+bool DLLEXPORT_OST_MOL HasElements(const EntityHandle& ent,
+                                   const std::vector<String>& elements);
+
+/// \brief create view with all peptide and nucleotide linking residues
+///
+/// Yields the same result as a selection with
+/// "peptide=true or nucleotide=true", but the residues are directly tested
+/// with ChemClass::IsPeptideLinking() and ChemClass::IsNucleotideLinking()
+/// instead of going through the query machinery. Selected residues include all
+/// their atoms. Bonds are included if both bond partners are part of the view.
+///
+/// \relates EntityView
+EntityView DLLEXPORT_OST_MOL SelectPolymerResidues(const EntityHandle& ent);
+
 /// \brief compare two entity views
 ///
 /// \throw IntegrityError if trying to compare two views that do not point to
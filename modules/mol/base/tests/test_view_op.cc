@@ -397,4 +397,78 @@ BOOST_AUTO_TEST_CASE(ent_from_view_atom_props)
   BOOST_CHECK_EQUAL(atom2.GetRadius(), Real(500.0));
 }
 
+BOOST_AUTO_TEST_CASE(test_exclude_elements)
+{
+  EntityHandle ent=CreateEntity();
+  XCSEditor edi=ent.EditXCS();
+  ChainHandle chain_a=edi.InsertChain("A");
+  ResidueHandle res_a=edi.AppendResidue(chain_a, "A");
+  AtomHandle atom_a=edi.InsertAtom(res_a, "N", geom::Vec3(), "N");
+  AtomHandle atom_b=edi.InsertAtom(res_a, "H", geom::Vec3(), "H");
+  AtomHandle atom_c=edi.InsertAtom(res_a, "CA", geom::Vec3(), "C");
+  ResidueHandle res_b=edi.AppendResidue(chain_a, "B");
+  AtomHandle atom_d=edi.InsertAtom(res_b, "D1", geom::Vec3(), "D");
+  ChainHandle chain_b=edi.InsertChain("B");
+  ResidueHandle res_c=edi.AppendResidue(chain_b, "C");
+  AtomHandle atom_e=edi.InsertAtom(res_c, "O", geom::Vec3(), "O");
+  edi.Connect(atom_a, atom_b);
+  edi.Connect(atom_a, atom_c);
+  edi.Connect(atom_c, atom_d);
+  edi.Connect(atom_c, atom_e);
+
+  std::vector<String> elements;
+  elements.push_back("H");
+  elements.push_back("D");
+  EntityView v1=mol::ExcludeElements(ent, elements);
+  BOOST_CHECK_EQUAL(v1.GetChainCount(), 2);
+  BOOST_CHECK_EQUAL(v1.GetResidueCount(), 2);
+  BOOST_CHECK_EQUAL(v1.GetAtomCount(), 3);
+  BOOST_CHECK_EQUAL(v1.GetBondCount(), 2);
+  BOOST_CHECK(v1.ViewForHandle(atom_a));
+  BOOST_CHECK(!v1.ViewForHandle(atom_b));
+  BOOST_CHECK(v1.ViewForHandle(atom_c));
+  BOOST_CHECK(!v1.ViewForHandle(res_b));
+  BOOST_CHECK(v1.ViewForHandle(atom_e));
+  BondHandleList bonds=v1.GetBondList();
+  BOOST_CHECK(find_bond(atom_a, atom_c, bonds));
+  BOOST_CHECK(find_bond(atom_c, atom_e, bonds));
+
+  // views only consider their own atoms
+  EntityView v2=mol::ExcludeElements(ent.Select("cname=A"), elements);
+  BOOST_CHECK_EQUAL(v2.GetChainCount(), 1);
+  BOOST_CHECK_EQUAL(v2.GetResidueCount(), 1);
+  BOOST_CHECK_EQUAL(v2.GetAtomCount(), 2);
+  BOOST_CHECK_EQUAL(v2.GetBondCount(), 1);
+  BOOST_CHECK(find_bond(atom_a, atom_c, v2.GetBondList()));
+
+  BOOST_CHECK(mol::HasElements(ent, elements));
+  std::vector<String> no_match;
+  no_match.push_back("S");
+  BOOST_CHECK(!mol::HasElements(ent, no_match));
+  BOOST_CHECK(!mol::HasElements(CreateEntity(), elements));
+}
+
+BOOST_AUTO_TEST_CASE(test_select_polymer_residues)
+{
+  EntityHandle ent=mk_test_ent();
+  ent.FindResidue("A", mol::ResNum(1)).SetChemClass(ChemClass(ChemClass::L_PEPTIDE_LINKING));
+  ent.FindResidue("A", mol::ResNum(2)).SetChemClass(ChemClass(ChemClass::RNA_LINKING));
+  ent.FindResidue("B", mol::ResNum(2)).SetChemClass(ChemClass(ChemClass::L_PEPTIDE_LINKING));
+  EntityView v=mol::SelectPolymerResidues(ent);
+  EntityView ref=ent.Select("peptide=true or nucleotide=true");
+  BOOST_CHECK_EQUAL(v.GetChainCount(), 2);
+  BOOST_CHECK_EQUAL(v.GetResidueCount(), 3);
+  BOOST_CHECK_EQUAL(v.GetAtomCount(), 6);
+  BOOST_CHECK_EQUAL(v.GetBondCount(), 4);
+  BOOST_CHECK_EQUAL(v.GetBondCount(), ref.GetBondCount());
+  BOOST_CHECK(!v.ViewForHandle(ent.FindResidue("B", mol::ResNum(1))));
+  BondHandleList bonds=v.GetBondList();
+  BOOST_CHECK(find_bond(ent.FindAtom("A", mol::ResNum(1), "B"),
+                        ent.FindAtom("A", mol::ResNum(2), "C"),
+                        bonds));
+  BOOST_CHECK(!find_bond(ent.FindAtom("A", mol::ResNum(2), "D"),
+                         ent.FindAtom("B", mol::ResNum(1), "E"),
+                         bonds));
+}
+
 BOOST_AUTO_TEST_SUITE_END();